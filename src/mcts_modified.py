@@ -104,6 +104,8 @@ def think(board: Board, current_state):
 
     """
     bot_identity = board.current_player(current_state) # 1 or 2
+    # child_nodes and untried_actions are indexed by position in node.actions; node.children and node.untried
+    # give the action-keyed views. A node built with action_list=None has no actions until set_actions.
     root_node = MCTSNode(parent=None, parent_action=None, action_list=board.legal_actions(current_state))
 
     for _ in range(num_nodes):
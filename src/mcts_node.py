@@ -1,24 +1,70 @@
 
 
 class MCTSNode:
+    __slots__ = ('parent', 'parent_action', 'child_nodes', 'actions', 'untried_actions',
+                 'expanded_actions',
+                 'child_visits', 'child_wins', 'child_virtual', 'wins', 'visits', 'virtual_loss',
+                 'best_action', 'best_visits')
+
     def __init__(self, parent=None, parent_action=None, action_list=[]):
         """ Initializes the tree node for MCTS. The node stores links to other nodes in the tree (parent and child
         nodes), as well as keeps track of the number of wins and total simulations that have visited the node.
+        The statistics of the children are also kept here as parallel lists, so selection can scan them without
+        touching the child nodes themselves.
 
         Args:
             parent:         The parent node of this node.
             parent_action:  The action taken from the parent node that transitions the state to this node.
-            action_list:    The list of legal actions to be considered at this node.
+            action_list:    The list of legal actions to be considered at this node, or None to leave them unset
+                            until set_actions is called.
 
         """
         self.parent = parent                    # Parent node to this node
         self.parent_action = parent_action      # The move that got us to this node - "None" for the root node.
 
-        self.child_nodes = {}                   # Action -> MCTSNode dictionary of children
-        self.untried_actions = action_list      # Yet unexplored actions
+        self.actions = None                     # Legal actions at this node, in a fixed order - "None" until set.
+        self.child_nodes = []                   # Children aligned with actions, None until expanded
+        self.untried_actions = []               # Indices of yet unexplored actions
+        self.expanded_actions = []              # Indices of explored actions, in the order they were expanded
+
+        self.child_visits = []                  # Visit count of each child, aligned with actions
+        self.child_wins = []                    # Win count of each child, aligned with actions
+        self.child_virtual = []                 # Virtual losses pending on each child, aligned with actions
+        if action_list is not None:
+            self.set_actions(action_list)
 
         self.wins = 0                           # Total wins of all paths through this node.
         self.visits = 0                         # Number of times this node has been visited.
+        self.virtual_loss = 0                   # Number of selected paths through this node not yet backpropagated.
+
+        self.best_action = None                 # Most visited action so far - only kept up to date at the root.
+        self.best_visits = 0                    # Visit count of best_action.
+
+    def set_actions(self, action_list):
+        """ Sets the legal actions of the node and sizes the per-child lists to match.
+
+        Args:
+            action_list:    The list of legal actions to be considered at this node.
+
+        """
+        self.actions = tuple(action_list)
+        self.child_nodes = [None] * len(self.actions)
+        self.untried_actions = list(range(len(self.actions)))
+        self.child_visits = [0] * len(self.actions)
+        self.child_wins = [0] * len(self.actions)
+        self.child_virtual = [0] * len(self.actions)
+
+    @property
+    def children(self):
+        """ The expanded children keyed by action, as child_nodes was before it became aligned with actions.
+        Building the dictionary costs a pass over the expanded actions, so the search itself indexes child_nodes.
+        """
+        return {self.actions[index]: self.child_nodes[index] for index in self.expanded_actions}
+
+    @property
+    def untried(self):
+        """ The yet unexplored actions themselves, rather than their indices in actions. """
+        return [self.actions[index] for index in self.untried_actions]
 
     def __repr__(self):
         """
@@ -40,6 +86,6 @@ class MCTSNode:
         """
         string = ''.join(['| ' for i in range(indent)]) + str(self) + '\n'
         if horizon > 0:
-            for child in self.child_nodes.values():
-                string += child.tree_to_string(horizon - 1, indent + 1)
+            for index in self.expanded_actions:
+                string += self.child_nodes[index].tree_to_string(horizon - 1, indent + 1)
         return string
@@ -1,14 +1,167 @@
 
 from mcts_node import MCTSNode
-from p2_t3 import Board
-from random import choice
+from p2_t3 import Board, positions
+from random import Random, getrandbits, random, seed
 from math import sqrt, log
+from functools import lru_cache
+from multiprocessing import get_all_start_methods, get_context
 
 num_nodes = 1000
 explore_faction = 2.
 MAX_DEPTH = 100
+batch_size = None  # Leaves selected under virtual loss before their rollouts are played out; None picks by budget
+# Independent trees searched in parallel by think, one per process. At 1 the search runs in-process and reuses the
+# tree of its previous call; above 1 every call starts fresh trees in the workers and nothing is reused.
+num_workers = 1
+
+# Zobrist keys for the p2_t3 state: one per (action, player) piece, one per sub-board constraint (or None) and one
+# for the side to move. The won/tied sub-boards follow from the pieces, so they need no keys of their own.
+_zobrist_random = Random(0)
+ZOBRIST_PIECES = {
+    (R, C, r, c): (0, _zobrist_random.getrandbits(64), _zobrist_random.getrandbits(64))
+    for R in range(3) for C in range(3) for r in range(3) for c in range(3)
+}
+ZOBRIST_CONSTRAINT = {(R, C): _zobrist_random.getrandbits(64) for R in (None, 0, 1, 2) for C in (None, 0, 1, 2)}
+ZOBRIST_TURN = _zobrist_random.getrandbits(64)
+
+TT = {}  # Zobrist hash -> (state, MCTSNode) for every node of the tree being searched
+_tables = {}  # Bot identity -> the TT its last in-process search left behind, so the next one can start from it
+
+NODE_POOL_SIZE = 1024
+_node_pool = [MCTSNode.__new__(MCTSNode) for _ in range(NODE_POOL_SIZE)]  # Spare nodes, reset when handed out
+
+def acquire_node(parent: MCTSNode|None, parent_action):
+    # Hands out a node from the pool, re-initialized in place, and only allocates once the pool runs dry.
+    if _node_pool:
+        node = _node_pool.pop()
+        node.__init__(parent=parent, parent_action=parent_action, action_list=None)
+        return node
+    return MCTSNode(parent=parent, parent_action=parent_action, action_list=None)
+
+def release_nodes(nodes):
+    # Returns nodes that no table refers to any more to the pool, up to its size. Their links are cut so that a
+    # pooled node does not keep the discarded tree, or the live one, reachable.
+    for node in nodes:
+        if len(_node_pool) >= NODE_POOL_SIZE:
+            break
+        node.parent = None
+        node.child_nodes = []
+        _node_pool.append(node)
+
+@lru_cache(maxsize=65536)
+def _legal_actions(board: Board, state):
+    # Board.legal_actions and Board.is_ended depend on the state alone, so repeated tree states are answered from
+    # cache. Rollouts call the board directly: their states are almost never seen twice, and the cache would only
+    # add hashing and eviction to every step.
+    return tuple(board.legal_actions(state))
+
+@lru_cache(maxsize=65536)
+def _is_ended(board: Board, state):
+    return board.is_ended(state)
+
+# Tables over the 9-bit masks a p2_t3 state keeps for each sub-board, where cell 3 * r + c is bit 3 * r + c:
+#   HAS_LINE[mask]            whether the mask holds three in a row.
+#   WINNING_CELLS[mask]       the empty cells that would give the mask three in a row.
+#   FREE_ACTIONS[b][free]     the actions on sub-board b = 3 * R + C for the cells set in the mask of empty cells.
+HAS_LINE = tuple(any(mask & w == w for w in Board.wins) for mask in range(0x200))
+WINNING_CELLS = tuple(
+    sum(1 << cell for cell in range(9) if not mask >> cell & 1 and HAS_LINE[mask | 1 << cell])
+    for mask in range(0x200)
+)
+BOARD_ACTIONS = tuple(tuple((b // 3, b % 3, cell // 3, cell % 3) for cell in range(9)) for b in range(9))
+FREE_ACTIONS = tuple(
+    tuple(tuple(BOARD_ACTIONS[b][cell] for cell in range(9) if free >> cell & 1) for free in range(0x200))
+    for b in range(9)
+)
+
+def game_ended(work):
+    # Board.is_ended on the won/tied sub-board masks, with the line checks read from HAS_LINE.
+    p1_boards, p2_boards = work[18], work[19]
+    return HAS_LINE[p1_boards & ~p2_boards] or HAS_LINE[p2_boards & ~p1_boards] or p1_boards | p2_boards == 0x1ff
+
+def apply_action(work: list, action):
+    # Plays action on a mutable copy of a p2_t3 state in place. This must stay in step with Board.next_state,
+    # which builds a new tuple for every move instead. Returns whether the move closed its sub-board, since
+    # that is the only way the game can end.
+    R, C, r, c = action
+    player = work[-1]
+    board_bit = 1 << (3 * R + C)
+    board_index = 2 * (3 * R + C)
+    player_index = player - 1
+
+    work[-1] = 3 - player
+    work[board_index + player_index] |= 1 << (3 * r + c)
+    updated_board = work[board_index + player_index]
+
+    closed = True
+    full = (work[board_index] | work[board_index + 1] == 0x1ff)
+    if HAS_LINE[updated_board]:
+        work[18 + player_index] |= board_bit
+    elif full:
+        work[18] |= board_bit
+        work[19] |= board_bit
+    else:
+        closed = False
+
+    if (work[18] | work[19]) >> (3 * r + c) & 1:
+        work[20], work[21] = None, None
+    else:
+        work[20], work[21] = r, c
+
+    return closed
+
+def zobrist_hash(state):
+    # Hashes a state from scratch; next_zobrist_hash keeps it up to date one action at a time.
+    state_hash = ZOBRIST_CONSTRAINT[state[20], state[21]]
+    if state[-1] == 2:
+        state_hash ^= ZOBRIST_TURN
+    for (R, C, r, c), keys in ZOBRIST_PIECES.items():
+        board_index = 2 * (3 * R + C)
+        for player in (1, 2):
+            if state[board_index + player - 1] & positions[(r, c)]:
+                state_hash ^= keys[player]
+    return state_hash
+
+def next_zobrist_hash(state_hash, state, action, new_state):
+    # The hash of new_state, reached by playing action from state.
+    return (state_hash ^ ZOBRIST_PIECES[action][state[-1]] ^ ZOBRIST_TURN
+            ^ ZOBRIST_CONSTRAINT[state[20], state[21]] ^ ZOBRIST_CONSTRAINT[new_state[20], new_state[21]])
+
+def best_child_index(child_wins, child_visits, child_virtual, scaled_log: float, sign: float, offset: float,
+                     _sqrt=sqrt):
+    """ Picks the child with the highest UCB value. Works only on the flat per-child statistics of a node, with no
+    access to nodes or game states, so the whole scan is plain arithmetic over three parallel sequences.
+
+    Paths still waiting on their rollout count as visits that were lost by whoever chooses at this level, which
+    steers the rest of a batch elsewhere. A child is only scanned once it has been expanded, and the path that
+    expanded it holds a virtual loss on it until its own result lands, so visits + pending is never zero and the
+    scan needs no unvisited-child branch.
+
+    The exploration term c * sqrt(log(N) / n) is evaluated as sqrt(c^2 * log(N) * n) / n, with c^2 * log(N) worked
+    out once by the caller, which leaves one division and one square root per child.
 
-def traverse_nodes(node: MCTSNode, board: Board, state, bot_identity: int):
+    Args:
+        child_wins:     The win count of each child.
+        child_visits:   The visit count of each child.
+        child_virtual:  The virtual losses pending on each child.
+        scaled_log:     explore_faction squared times the log of the parent's visit count, including its own
+                        pending paths.
+        sign:           -1 when scoring for the opponent, 1 otherwise.
+        offset:         1 when scoring for the opponent, 0 otherwise.
+    Returns:
+        The index of the best child
+    """
+    best_index = 0
+    best_score = float('-inf')
+    for index, (wins, visits, pending) in enumerate(zip(child_wins, child_visits, child_virtual)):
+        total = visits + pending
+        score = (offset * visits + sign * wins + _sqrt(scaled_log * total)) / total
+        if score > best_score:
+            best_score = score
+            best_index = index
+    return best_index
+
+def traverse_nodes(node: MCTSNode, board: Board, state, state_hash: int, bot_identity: int, path: list):
     """Traverses the tree until the end criterion are met.
     e.g., find the best expandable node (node with untried action) if it exists,
     or else a terminal node.
@@ -17,33 +170,54 @@ def traverse_nodes(node: MCTSNode, board: Board, state, bot_identity: int):
         node: A tree node from which the search is traversing.
         board: The game setup.
         state: The state of the game.
+        state_hash: The Zobrist hash of the state.
         bot_identity: The bot's identity, either 1 or 2.
+        path: A list to which each (node, child index) edge taken is appended.
 
     Returns:
         node: A node from which the next stage of the search can proceed.
         state: The state associated with that node.
+        state_hash: The Zobrist hash of that state.
     """
-    while node.child_nodes and not node.untried_actions:
-        if node.parent is None:
-            is_opponent = False
-        else:
-            is_opponent = board.current_player(state) != bot_identity
+    # Bound once per call so the loop below resolves them as fast locals. The squared exploration constant is
+    # also worked out here rather than at import, so changes to explore_faction still take effect.
+    current_player, next_state, _log = board.current_player, board.next_state, log
+    c_squared = explore_faction * explore_faction
+    while True:
+        # Nodes are created without their actions; look them up the first time the search comes back to one.
+        if node.actions is None:
+            node.set_actions(() if _is_ended(board, state) else _legal_actions(board, state))
+        if not node.expanded_actions or node.untried_actions:
+            break
 
-        ucb_values = {action: ucb(child, is_opponent) for action, child in node.child_nodes.items()}
-        best_action = max(ucb_values, key=ucb_values.get)
-        node = node.child_nodes[best_action]
-        state = board.next_state(state, best_action)
-        
-    return node, state
+        is_opponent = current_player(state) != bot_identity
+        # Scoring from the opponent's side is 1 - win_rate; fold that into a sign and an offset for the level.
+        sign = -1.0 if is_opponent else 1.0
+        offset = 1.0 if is_opponent else 0.0
+
+        # The parent term of the exploration bonus is shared by every child, so take its log once per node.
+        scaled_log = c_squared * _log(node.visits + node.virtual_loss)
+        best_index = best_child_index(node.child_wins, node.child_visits, node.child_virtual, scaled_log, sign, offset)
+        best_action = node.actions[best_index]
+        path.append((node, best_index))
+        node = node.child_nodes[best_index]
+        new_state = next_state(state, best_action)
+        state_hash = next_zobrist_hash(state_hash, state, best_action, new_state)
+        state = new_state
+
+    return node, state, state_hash
 
 
-def expand_leaf(node: MCTSNode, board: Board, state):
+def expand_leaf(node: MCTSNode, board: Board, state, state_hash: int, path: list):
     """ Adds a new leaf to the tree by creating a new child node for the given node (if it is non-terminal).
+    If the resulting state is already in the tree by another move order, its node from TT is linked in instead.
 
     Args:
         node:   The node for which a child will be added.
         board:  The game setup.
         state:  The state of the game.
+        state_hash: The Zobrist hash of the state.
+        path:   A list to which the (node, child index) edge taken is appended.
 
     Returns:
         node: The added child node
@@ -52,16 +226,34 @@ def expand_leaf(node: MCTSNode, board: Board, state):
     """
     if node.untried_actions:
 
-        action = node.untried_actions.pop()
+        index = node.untried_actions.pop()
+        action = node.actions[index]
         new_state = board.next_state(state, action)
-        new_node = MCTSNode(parent=node, parent_action=action, action_list=board.legal_actions(new_state))
-        node.child_nodes[action] = new_node
+        new_hash = next_zobrist_hash(state_hash, state, action, new_state)
+
+        entry = TT.get(new_hash)
+        if entry is not None and entry[0] == new_state:
+            new_node = entry[1]
+        else:
+            new_node = acquire_node(parent=node, parent_action=action)
+            TT[new_hash] = (new_state, new_node)
+
+        path.append((node, index))
+        node.child_nodes[index] = new_node
+        node.expanded_actions.append(index)
+        return new_node, new_state
 
     return node, state
 
 
 def rollout(board: Board, state):
-    """ Given the state of the game, the rollout plays out the remainder randomly.
+    """ Given the state of the game, the rollout plays out the remainder randomly. The moves are played on a single
+    mutable copy of the state, and only the terminal state is turned back into a tuple.
+
+    The playout is slightly heavy: a move that wins its sub-board for the player to move is always taken, and only
+    when there is none is the move picked uniformly at random. The end of the game is only checked after a move
+    that closes a sub-board. Legal moves, winning cells and the end of the game are all read from the bitmask
+    tables above instead of going through the board.
 
     Args:
         board:  The game setup.
@@ -71,57 +263,88 @@ def rollout(board: Board, state):
         state: The terminal game state
 
     """
+    work = list(state)
     depth = 0
-    while not board.is_ended(state) and depth < MAX_DEPTH:
-        legal_actions = board.legal_actions(state)
-        if not legal_actions:
-            # If no legal actions are available, break the loop
-            break
-        move = choice(legal_actions)
-        state = board.next_state(state, move)
+    ended = game_ended(work)
+    while not ended and depth < MAX_DEPTH:
+        if work[20] is None:
+            finished = work[18] | work[19]
+            boards = [b for b in range(9) if not finished >> b & 1]
+        else:
+            boards = (3 * work[20] + work[21],)
+
+        player_index = work[-1] - 1
+        move = None
+        legal_actions = ()
+        for b in boards:
+            free = ~(work[2 * b] | work[2 * b + 1]) & 0x1ff
+            winning = WINNING_CELLS[work[2 * b + player_index]] & free
+            if winning:
+                move = BOARD_ACTIONS[b][(winning & -winning).bit_length() - 1]
+                break
+            legal_actions += FREE_ACTIONS[b][free]
+
+        if move is None:
+            if not legal_actions:
+                # If no legal actions are available, break the loop
+                break
+            move = legal_actions[int(random() * len(legal_actions))]
+
+        if apply_action(work, move):
+            ended = game_ended(work)
         depth += 1
 
-    return state
+    return tuple(work)
 
 
-def backpropagate(node: MCTSNode|None, won: bool):
-    """ Navigates the tree from a leaf node to the root, updating the win and visit count of each node along the path.
+def apply_virtual_loss(node: MCTSNode, path: list):
+    """ Marks a selected leaf node and the path from the root to it as pending a rollout.
 
     Args:
         node:   A leaf node.
-        won:    An indicator of whether the bot won or lost the game.
+        path:   The (node, child index) edges taken from the root to the leaf.
 
     """
-    while node is not None:
-        node.visits += 1
+    node.virtual_loss += 1
+    for parent, index in path:
+        parent.virtual_loss += 1
+        parent.child_virtual[index] += 1
 
-        if won:
-            node.wins += 1
-
-        node = node.parent
-    
-def ucb(node: MCTSNode, is_opponent: bool):
-    """ Calcualtes the UCB value for the given node from the perspective of the bot
+def backpropagate(node: MCTSNode, path: list, won: bool):
+    """ Navigates the tree from a leaf node to the root, updating the win and visit count of each node along the path.
+    The path is followed rather than the parent links, since a node shared through TT can have several parents.
+    The virtual loss placed on the path by apply_virtual_loss is taken back as the real result is recorded, and the
+    root's most visited action is updated as its child's count goes up.
 
     Args:
-        node:   A node.
-        is_opponent: A boolean indicating whether or not the last action was performed by the MCTS bot
-    Returns:
-        The value of the UCB function for the given node
+        node:   A leaf node.
+        path:   The (node, child index) edges taken from the root to the leaf.
+        won:    An indicator of whether the bot won or lost the game.
+
     """
-    if node.visits == 0:
-        return float('inf')  # Ensure unvisited nodes are prioritized
-    
-    win_rate = node.wins / node.visits
-    if is_opponent:
-        win_rate = 1 - win_rate
+    node.virtual_loss -= 1
+    node.visits += 1
+    if won:
+        node.wins += 1
+
+    for parent, index in reversed(path):
+        parent.virtual_loss -= 1
+        parent.visits += 1
+        # Keep the parent's per-child statistics in step with the edge just walked.
+        parent.child_virtual[index] -= 1
+        parent.child_visits[index] += 1
+        if won:
+            parent.wins += 1
+            parent.child_wins[index] += 1
 
-    exploration_term = explore_faction * sqrt(log(node.parent.visits) / node.visits)
-    
-    return win_rate + exploration_term
+    if path:
+        root_node, index = path[0]
+        if root_node.child_visits[index] > root_node.best_visits:
+            root_node.best_visits = root_node.child_visits[index]
+            root_node.best_action = root_node.actions[index]
 
 def get_best_action(root_node: MCTSNode):
-    """ Selects the best action from the root node in the MCTS tree
+    """ Selects the best action from the root node in the MCTS tree, as tracked by backpropagate
 
     Args:
         root_node:   The root node
@@ -129,15 +352,7 @@ def get_best_action(root_node: MCTSNode):
         action: The best action from the root node
     
     """
-    best_action = None
-    max_visits = -1
-
-    for action, child in root_node.child_nodes.items():
-        if child.visits > max_visits:
-            max_visits = child.visits
-            best_action = action
-
-    return best_action
+    return root_node.best_action
 
 def is_win(board: Board, state, identity_of_bot: int):
     # checks if state is a win state for identity_of_bot
@@ -145,38 +360,181 @@ def is_win(board: Board, state, identity_of_bot: int):
     assert outcome is not None, "is_win was called on a non-terminal state"
     return outcome[identity_of_bot] == 1
 
-def think(board: Board, current_state):
-    """ Performs MCTS by sampling games and calling the appropriate functions to construct the game tree.
+def prune_table(table: dict, root_node: MCTSNode):
+    """ Keeps only the entries of a transposition table that can still be reached from a new root node, and unlinks
+    surviving nodes from parents that are dropped. The dropped nodes go back to the node pool.
 
     Args:
+        table:      A transposition table left by a previous search.
+        root_node:  The node of that table for the current state.
+    Returns:
+        The pruned table
+    """
+    reachable = {id(root_node)}
+    stack = [root_node]
+    while stack:
+        node = stack.pop()
+        for index in node.expanded_actions:
+            child = node.child_nodes[index]
+            if id(child) not in reachable:
+                reachable.add(id(child))
+                stack.append(child)
+
+    pruned = {}
+    dropped = []
+    for state_hash, (state, node) in table.items():
+        if id(node) in reachable:
+            if node.parent is not None and id(node.parent) not in reachable:
+                node.parent = None
+            pruned[state_hash] = (state, node)
+        else:
+            dropped.append(node)
+    release_nodes(dropped)
+    return pruned
+
+def select_leaves(root_node: MCTSNode, board: Board, root_state, root_hash: int, bot_identity: int, count: int):
+    """ Selects and expands a batch of leaves, placing a virtual loss on each path before selecting the next one.
+
+    Args:
+        root_node:  The root node
         board:  The game setup.
-        current_state:  The current state of the game.
+        root_state: The state of the game at the root.
+        root_hash:  The Zobrist hash of that state.
+        bot_identity: The bot's identity, either 1 or 2.
+        count:  The number of leaves to select.
 
-    Returns:    The action to be taken from the current state
+    Returns:    A list of (leaf node, path from the root, leaf state) triples
 
     """
-    bot_identity = board.current_player(current_state) # 1 or 2
-    root_node = MCTSNode(parent=None, parent_action=None, action_list=board.legal_actions(current_state))
+    leaves = []
+    for _ in range(count):
+        path = []
+        node, state, state_hash = traverse_nodes(root_node, board, root_state, root_hash, bot_identity, path)
+        if node.untried_actions:
+            node, state = expand_leaf(node, board, state, state_hash, path)
 
-    for _ in range(num_nodes):
-        state = current_state
-        node = root_node
+        apply_virtual_loss(node, path)
+        leaves.append((node, path, state))
+    return leaves
 
-        # Do MCTS - This is all you!
-        # ...
-        # Selection
-        node, state = traverse_nodes(node, board, state, bot_identity)
+def search(board: Board, current_state, bot_identity: int, iterations: int):
+    """ Grows the MCTS tree rooted at the current state in batches: a batch of leaves is selected, each under the
+    virtual loss of the ones before it, then all of them are played out, then all the results are backpropagated.
+    The batch size is batch_size, or by default 4 for budgets of up to 1000 iterations and 16 above that. States
+    reached by more than one move order share a single node through the transposition table TT.
 
-        # Expansion
-        if node.untried_actions:
-            node, state = expand_leaf(node, board, state)
+    The table is kept per bot identity between calls. If the current state was already in the tree of this bot's
+    previous search (our move and the opponent's reply were both explored), that subtree and its statistics become
+    the new root and the rest is dropped; otherwise the search starts from scratch.
+
+    Args:
+        board:  The game setup.
+        current_state:  The current state of the game.
+        bot_identity: The bot's identity, either 1 or 2.
+        iterations: The number of selection/expansion/simulation/backpropagation passes to run.
 
-        # Simulation
-        final_state = rollout(board, state)
+    Returns:    The root node of the tree
+
+    """
+    global TT
+    root_hash = zobrist_hash(current_state)
+    entry = _tables.get(bot_identity, {}).get(root_hash)
+    if entry is not None and entry[0] == current_state:
+        root_node = entry[1]
+        TT = prune_table(_tables[bot_identity], root_node)
+
+        # The node was not a root while its statistics were gathered, so find its most visited action once here.
+        for index in root_node.expanded_actions:
+            if root_node.child_visits[index] > root_node.best_visits:
+                root_node.best_visits = root_node.child_visits[index]
+                root_node.best_action = root_node.actions[index]
+    else:
+        release_nodes(node for _, node in _tables.get(bot_identity, {}).values())
+        root_node = acquire_node(parent=None, parent_action=None)
+        TT = {root_hash: (current_state, root_node)}
+    _tables[bot_identity] = TT
+
+    # Only nodes below the root look their actions up lazily; the root's are needed even if no iteration runs.
+    if root_node.actions is None:
+        root_node.set_actions(_legal_actions(board, current_state))
+
+    # Small batches keep virtual loss from flattening a small tree; larger budgets can afford wider ones.
+    size = batch_size or (4 if iterations <= 1000 else 16)
+    for start in range(0, iterations, size):
+        # Selection and expansion
+        leaves = select_leaves(root_node, board, current_state, root_hash, bot_identity, min(size, iterations - start))
+
+        # Simulation; a terminal leaf is selected over and over, so its check is worth caching.
+        final_states = [state if _is_ended(board, state) else rollout(board, state) for _, _, state in leaves]
 
         # Backpropagation
-        won = is_win(board, final_state, bot_identity)
-        backpropagate(node, won)
+        for (node, path, _), final_state in zip(leaves, final_states):
+            backpropagate(node, path, is_win(board, final_state, bot_identity))
+
+    return root_node
+
+_pool = None  # Worker processes kept between think calls
+_pool_workers = 0
+
+def _get_pool(workers: int):
+    # Forks the worker pool on first use, and again only if the number of workers changes.
+    global _pool, _pool_workers
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.terminate()
+        _pool = get_context('fork').Pool(workers)
+        _pool_workers = workers
+    return _pool
+
+def _worker(args):
+    # Runs one independent search in a pool process and reports the visit count of each root action. Every job
+    # grows a fresh tree; the process keeps nothing from the jobs it ran before. The pool outlives the settings it
+    # was forked with, so each job carries the caller's current ones.
+    global explore_faction, MAX_DEPTH, batch_size
+    board, current_state, bot_identity, worker_seed, iterations, settings = args
+    explore_faction, MAX_DEPTH, batch_size = settings
+    seed(worker_seed)
+    for table in _tables.values():
+        release_nodes(node for _, node in table.values())
+    _tables.clear()
+    root_node = search(board, current_state, bot_identity, iterations)
+    return dict(zip(root_node.actions, root_node.child_visits))
+
+def think(board: Board, current_state):
+    """ Performs MCTS by sampling games and calling the appropriate functions to construct the game tree.
+
+    With more than one worker the search is root-parallel: each process grows its own tree from a different seed
+    and the root visit counts of all the trees are summed before picking the action. The worker processes are
+    forked once and kept for later calls.
+
+    Args:
+        board:  The game setup.
+        current_state:  The current state of the game.
+
+    Returns:    The action to be taken from the current state
+
+    """
+    bot_identity = board.current_player(current_state) # 1 or 2
+
+    # Workers are forked so they inherit the already-imported game modules; without fork, search in-process.
+    workers = min(num_workers, num_nodes)
+    if workers > 1 and 'fork' in get_all_start_methods():
+        # Split the budget as evenly as possible, the first workers taking one extra iteration each.
+        iterations, extra = divmod(num_nodes, workers)
+        settings = (explore_faction, MAX_DEPTH, batch_size)
+        jobs = [(board, current_state, bot_identity, getrandbits(64), iterations + (i < extra), settings)
+                for i in range(workers)]
+        results = _get_pool(workers).map(_worker, jobs)
+
+        # The most visited action tracked by backpropagate belongs to a single tree, so across the workers' trees
+        # the summed counts are still scanned. The default in-process search reads it directly below.
+        total_visits = {}
+        for visits in results:
+            for action, count in visits.items():
+                total_visits[action] = total_visits.get(action, 0) + count
+        return max(total_visits, key=total_visits.get)
+
+    root_node = search(board, current_state, bot_identity, num_nodes)
 
     # Return an action, typically the most frequently used action (from the root) or the action with the best
     # estimated win rate.